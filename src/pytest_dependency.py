@@ -2,9 +2,11 @@
 
 __version__ = "$VERSION"
 
+import functools
 import inspect
 import logging
-from types import ModuleType
+import sys
+from types import ModuleType, SimpleNamespace
 from typing import Callable, Dict, List, Type
 
 import pytest
@@ -12,107 +14,245 @@ from _pytest.mark.structures import ParameterSet
 
 logger = logging.getLogger(__name__)
 
-_accept_xfail = False
-_automark = False
-_ignore_unknown = False
+# Plugin configuration, populated by pytest_configure().  A single
+# namespace keeps the flag reads in the hot hooks down to one global
+# lookup plus a C-level attribute read.
+_CFG = SimpleNamespace(
+    accept_xfail=False,
+    automark=False,
+    ignore_unknown=False,
+    record_all_scopes=True,
+    # Whether any collected item carries a dependency marker; until
+    # collection has determined this, assume yes.
+    any_dep=True,
+)
+_depend_targets = None
+
+_MISSING = object()
+
+
+def _get_marker(item):
+    """Get the "dependency" marker of item, caching the lookup.
+
+    get_closest_marker() walks the item's own markers plus those of all
+    parent nodes.  The hooks below need the marker up to four times per
+    test (three report phases plus setup), so cache the result on the
+    item after the first lookup.
+    """
+    marker = getattr(item, "_dependency_marker", _MISSING)
+    if marker is _MISSING:
+        marker = item.get_closest_marker("dependency")
+        item._dependency_marker = marker
+    return marker
+
+
+def _marker_info(item):
+    """Get the dependency marker of item along with its keyword
+    arguments, as a (marker, name, depends, scope) tuple.
+
+    The tuple is computed once per item, normally already at collection
+    time, and cached on the item for the runtime hooks.
+    """
+    info = getattr(item, "_dependency_info", None)
+    if info is None:
+        marker = _get_marker(item)
+        if marker is None:
+            info = (None, None, None, None)
+        else:
+            # Deduplicate the declared dependencies, keeping their
+            # order, so each one is checked only once per test setup.
+            item_depends = marker.kwargs.get("depends")
+            if item_depends:
+                item_depends = tuple(dict.fromkeys(item_depends))
+            info = (
+                marker,
+                marker.kwargs.get("name"),
+                item_depends,
+                marker.kwargs.get("scope", "module"),
+            )
+        item._dependency_info = info
+    return info
+
+
+def _scope_names(item):
+    """Derive the default result name of item for each scope.
+
+    Compute all four names from the node id in one go, so that
+    registering the result in several scopes does not redo the string
+    splitting per scope.  The result is cached on the item, the node id
+    does not change between the setup, call, and teardown reports.
+    """
+    names = getattr(item, "_dependency_scope_names", None)
+    if names is None:
+        # Old versions of pytest used to add an extra "::()" to the
+        # node ids of class methods to denote the class instance.
+        # This has been removed in pytest 4.0.0, so on modern pytest
+        # the substring test always fails and the replace (which would
+        # allocate a new string) is skipped.
+        nodeid = item.nodeid
+        if "::()::" in nodeid:
+            nodeid = nodeid.replace("::()::", "::")
+        parts = nodeid.split("::")
+        names = {
+            "session": nodeid,
+            "package": nodeid,
+            "module": "::".join(parts[1:]),
+            "class": "::".join(parts[2:]),
+        }
+        item._dependency_scope_names = names
+    return names
 
 
 class DependencyItemStatus(object):
     """Status of a test item in a dependency manager."""
 
+    __slots__ = ("results", "_is_success")
+
     Phases = ("setup", "call", "teardown")
 
     def __init__(self):
-        self.results = {w: None for w in self.Phases}
+        self.results = _EMPTY_RESULTS.copy()
+        self._is_success = False
 
     def __str__(self):
         status_list = [f"{w}: {self.results[w]}" for w in self.Phases]
         return f'Status({", ".join(status_list)})'
 
-    def _accept_xfail(self, rep):
-        """Take xfail and accept_xfail into account."""
-        return (
-            _accept_xfail
-            and (rep.when == "call")
-            and (rep.outcome == "skipped")
-            and (hasattr(rep, "wasxfail"))
+    def _updateSuccess(self):
+        results = self.results
+        self._is_success = (
+            results["setup"] == "passed"
+            and results["call"] == "passed"
+            and results["teardown"] == "passed"
         )
 
-    def addResult(self, rep):
-        self.results[rep.when] = (
-            "passed" if self._accept_xfail(rep) else rep.outcome
-        )
+    def _addResultXfail(self, rep):
+        # Only bound as addResult when the accept_xfail ini option is
+        # on, so the option itself need not be checked here.
+        when = rep.when
+        if (
+            when == "call"
+            and rep.outcome == "skipped"
+            and hasattr(rep, "wasxfail")
+        ):
+            outcome = "passed"
+        else:
+            # Intern the outcome so that the comparisons in
+            # _updateSuccess() hit the pointer-equality fast path.
+            outcome = sys.intern(rep.outcome)
+        self.results[when] = outcome
+        if when == "teardown":
+            self._updateSuccess()
+
+    def _addResultPlain(self, rep):
+        when = rep.when
+        self.results[when] = sys.intern(rep.outcome)
+        if when == "teardown":
+            self._updateSuccess()
+
+    # pytest_configure() rebinds this to _addResultXfail when the
+    # accept_xfail ini option is on, so that the default hot path does
+    # not probe for xfail on every report.  The plain variant is the
+    # default, matching the default of the ini option.
+    addResult = _addResultPlain
 
     def isSuccess(self):
-        return list(self.results.values()) == ["passed", "passed", "passed"]
+        # Computed when the result is recorded: the same status is
+        # checked by every dependent test, so reading it must be cheap.
+        return self._is_success
+
+
+_EMPTY_RESULTS = dict.fromkeys(DependencyItemStatus.Phases)
+
+_SCOPE_ORDER = (
+    ("session", pytest.Session),
+    ("package", pytest.Package),
+    ("module", pytest.Module),
+    ("class", pytest.Class),
+)
+_SCOPE_CLS = dict(_SCOPE_ORDER)
+_ALL_SCOPES = tuple(sys.intern(s) for s in _SCOPE_CLS)
 
 
 class DependencyManager(object):
     """Dependency manager, stores the results of tests."""
 
-    ScopeCls = {
-        "session": pytest.Session,
-        "package": pytest.Package,
-        "module": pytest.Module,
-        "class": pytest.Class,
-    }
+    __slots__ = ("results", "scope")
+
+    ScopeCls = _SCOPE_CLS
+
+    # Mirrors the --ignore-unknown-dependency option; set by
+    # pytest_configure().  A class attribute read is cheaper than a
+    # module global lookup in checkDepend().
+    _ignore_unknown = False
 
     @classmethod
     def getManager(cls, item, scope):
         """Get the DependencyManager object from the node at scope level.
         Create it, if not yet present.
         """
-        node = item.getparent(cls.ScopeCls[scope])
+        cache = item.__dict__.setdefault("_dependency_managers", {})
+        if scope in cache:
+            return cache[scope]
+        node = item.getparent(_SCOPE_CLS[scope])
         if not node:
-            return None
-        if not hasattr(node, "dependencyManager"):
-            node.dependencyManager = cls(scope)
-        return node.dependencyManager
+            manager = None
+        else:
+            # Plain dict access instead of hasattr/getattr, skipping
+            # the attribute protocol of the pytest node classes.
+            node_dict = node.__dict__
+            manager = node_dict.get("dependencyManager")
+            if manager is None:
+                manager = node_dict["dependencyManager"] = cls(scope)
+        cache[scope] = manager
+        return manager
 
     def __init__(self, scope):
         self.results = {}
         self.scope = scope
 
-    def addResult(self, item, name, rep):
-        if not name:
-            # Old versions of pytest used to add an extra "::()" to
-            # the node ids of class methods to denote the class
-            # instance.  This has been removed in pytest 4.0.0.
-            nodeid = item.nodeid.replace("::()::", "::")
-            if self.scope in ["session", "package"]:
-                name = nodeid
-            elif self.scope == "module":
-                name = nodeid.split("::", 1)[1]
-            elif self.scope == "class":
-                name = nodeid.split("::", 2)[2]
-            else:
-                raise RuntimeError(
-                    "Internal error: invalid scope '%s'" % self.scope
-                )
+    def addResult(self, name, rep):
         status = self.results.setdefault(name, DependencyItemStatus())
-        logger.debug(
-            "register %s %s %s in %s scope",
-            rep.when,
-            name,
-            rep.outcome,
-            self.scope,
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "register %s %s %s in %s scope",
+                rep.when,
+                name,
+                rep.outcome,
+                self.scope,
+            )
         status.addResult(rep)
 
     def checkDepend(self, depends, item):
-        logger.debug(
-            "check dependencies of %s in %s scope ...", item.name, self.scope
-        )
+        # This runs once per dependency of every dependent test, so
+        # skip the no-op logging calls unless debugging is on and keep
+        # the loop to one dict lookup per dependency.
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(
+                "check dependencies of %s in %s scope ...",
+                item.name,
+                self.scope,
+            )
+        results = self.results
+        ignore_unknown = self._ignore_unknown
+        if not results and ignore_unknown:
+            # Nothing has been registered yet, e.g. a single test run
+            # in isolation: all dependencies are unknown.
+            return
         for i in depends:
-            if i in self.results:
-                if self.results[i].isSuccess():
-                    logger.debug("... %s succeeded", i)
+            status = results.get(i)
+            if status is not None:
+                if status.isSuccess():
+                    if debug:
+                        logger.debug("... %s succeeded", i)
                     continue
-                else:
+                if debug:
                     logger.debug("... %s has not succeeded", i)
             else:
-                logger.debug("... %s is unknown", i)
-                if _ignore_unknown:
+                if debug:
+                    logger.debug("... %s is unknown", i)
+                if ignore_unknown:
                     continue
             logger.info("skip %s because it depends on %s", item.name, i)
             pytest.skip(f"{item.name} depends on {i}")
@@ -160,6 +300,23 @@ def pytest_addoption(parser):
         type="bool",
         default=False,
     )
+    parser.addini(
+        "dependency_record_all_scopes",
+        "Record test outcomes in all scopes.  If disabled, outcomes are "
+        "only recorded in the scope declared on the marker and in "
+        "session scope, saving memory on large test suites.",
+        type="bool",
+        default=True,
+    )
+    parser.addini(
+        "dependency_record_depends_only",
+        "Only record outcomes of tests that some dependency marker "
+        "refers to.  Bounds the memory used for result bookkeeping on "
+        "large test suites, but breaks depends() calls that name tests "
+        "not referenced by any marker.",
+        type="bool",
+        default=False,
+    )
     parser.addoption(
         "--ignore-unknown-dependency",
         action="store_true",
@@ -169,10 +326,19 @@ def pytest_addoption(parser):
 
 
 def pytest_configure(config):
-    global _accept_xfail, _automark, _ignore_unknown
-    _accept_xfail = config.getini("accept_xfail")
-    _automark = config.getini("automark_dependency")
-    _ignore_unknown = config.getoption("--ignore-unknown-dependency")
+    global _depend_targets
+    _CFG.accept_xfail = config.getini("accept_xfail")
+    _CFG.automark = config.getini("automark_dependency")
+    _CFG.ignore_unknown = config.getoption("--ignore-unknown-dependency")
+    _CFG.record_all_scopes = config.getini("dependency_record_all_scopes")
+    _CFG.any_dep = True
+    _depend_targets = None
+    DependencyManager._ignore_unknown = _CFG.ignore_unknown
+    DependencyItemStatus.addResult = (
+        DependencyItemStatus._addResultXfail
+        if _CFG.accept_xfail
+        else DependencyItemStatus._addResultPlain
+    )
     config.addinivalue_line(
         "markers",
         "dependency(name=None, depends=[]): "
@@ -181,29 +347,92 @@ def pytest_configure(config):
     )
 
 
+def _item_managers(item, scopes):
+    """List the dependency managers of item for the given scopes.
+
+    Scopes without a manager are dropped.  The list is resolved once
+    per item and cached on it, so the three report phases share one
+    scope walk.
+    """
+    managers = getattr(item, "_dependency_item_managers", None)
+    if managers is None:
+        managers = [
+            (scope, manager)
+            for scope in scopes
+            if (manager := DependencyManager.getManager(item, scope=scope))
+        ]
+        item._dependency_item_managers = managers
+    return managers
+
+
+def pytest_collection_modifyitems(config, items):
+    """Precompute the dependency marker info for all items.
+
+    If the dependency_record_depends_only ini option is set, also
+    collect the names that any dependency marker refers to: outcome
+    recording is then limited to this set of names.
+    """
+    global _depend_targets
+    targets = (
+        set() if config.getini("dependency_record_depends_only") else None
+    )
+    any_dep = _CFG.automark
+    for item in items:
+        marker, _, item_depends, _ = _marker_info(item)
+        if marker is not None:
+            any_dep = True
+        if targets is not None and item_depends:
+            targets.update(item_depends)
+    _CFG.any_dep = any_dep
+    if targets is not None:
+        _depend_targets = targets
+
+
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_runtest_makereport(item, call):
     """Store the test outcome if this item is marked "dependency"."""
-    outcome = yield
-    marker = item.get_closest_marker("dependency")
-    if marker is not None or _automark:
+    if not _CFG.any_dep:
+        # No dependency marker anywhere in the session and automark is
+        # off: nothing will ever be recorded.
+        yield
+        return
+    marker, name, _, marker_scope = _marker_info(item)
+    if marker is None and not _CFG.automark:
+        # Nothing to record for this item, get out of the way before
+        # touching the report.
+        yield
+    else:
+        outcome = yield
         rep = outcome.get_result()
-        name = marker.kwargs.get("name") if marker is not None else None
-        for scope in DependencyManager.ScopeCls:
-            if manager := DependencyManager.getManager(item, scope=scope):
-                manager.addResult(item, name, rep)
+        scope_names = _scope_names(item) if not name else None
+        if _CFG.record_all_scopes:
+            scopes = _ALL_SCOPES
+        else:
+            # Record only where the result may actually be looked up:
+            # the scope declared on the marker, plus session scope for
+            # runtime depends(..., scope="session") calls.
+            scope = marker_scope if marker is not None else "module"
+            scopes = ("session",) if scope == "session" else ("session", scope)
+        for scope, manager in _item_managers(item, scopes):
+            result_name = name or scope_names[scope]
+            if (
+                _depend_targets is not None
+                and result_name not in _depend_targets
+            ):
+                continue
+            manager.addResult(result_name, rep)
 
 
 def pytest_runtest_setup(item):
     """Check dependencies if this item is marked "dependency".
     Skip if any of the dependencies has not been run successfully.
     """
-    marker = item.get_closest_marker("dependency")
-    if marker is not None:
-        if depends := marker.kwargs.get("depends"):
-            scope = marker.kwargs.get("scope", "module")
-            manager = DependencyManager.getManager(item, scope=scope)
-            manager.checkDepend(depends, item)
+    if not _CFG.any_dep:
+        return
+    _, _, item_depends, scope = _marker_info(item)
+    if item_depends:
+        manager = DependencyManager.getManager(item, scope=scope)
+        manager.checkDepend(item_depends, item)
 
 
 def mark_dependency(mocked, dependent_tests):
@@ -287,9 +516,9 @@ def build_mocked_assets(
             f"module {mocks_module}."
         )
 
+    prefix = f"{test_function.__name__}["
     mocked_test_names = [
-        f"{test_function.__name__}[{asset_name}]"
-        for asset_name in asset_map.values()
+        prefix + asset_name + "]" for asset_name in asset_map.values()
     ]
 
     return _build_mocking_config(
@@ -300,25 +529,47 @@ def build_mocked_assets(
 def _build_mocking_config(
     asset_to_mock, custom_exceptions, asset_map, mocked_test_names
 ) -> List[ParameterSet]:
+    # Single pass over the asset map: one dict.get per asset instead of
+    # a membership test plus a second loop.  This also keeps the param
+    # order aligned with the mocked test names, which are derived from
+    # the same map.
     mocking_config = [
-        mark_xfail(asset)
+        mark_xfail(asset, custom_exceptions.get(asset, AssertionError))
         for asset in asset_map
-        if asset not in custom_exceptions
     ]
-    for asset, expected in custom_exceptions.items():
-        mocking_config.append(mark_xfail(asset, expected))
-
     mocking_config.append(mark_dependency(asset_to_mock, mocked_test_names))
     return mocking_config
 
 
+@functools.lru_cache(maxsize=4096)
+def _cached_getmodule(asset):
+    """Cached inspect.getmodule().
+
+    getmodule() walks sys.modules and file path heuristics; the same
+    assets are typically inspected several times per assessment run.
+    """
+    return inspect.getmodule(asset)
+
+
+@functools.lru_cache(maxsize=None)
 def _build_asset_map(mocks_module):
-    return {
-        asset: asset_name
-        for asset_name, asset in inspect.getmembers(mocks_module)
+    # Memoized per module object: the same mocks module is typically
+    # scanned once per test function that build_mocked_assets
+    # parametrizes, and its contents do not change within a session.
+    # Iterate the module __dict__ directly rather than going through
+    # inspect.getmembers(), which sorts dir() and getattr's every name.
+    # The cheap name-prefix check comes first, so the imports and
+    # dunders that make up most of a mocks module are rejected without
+    # any inspect call.
+    asset_map = {}
+    for asset_name, asset in mocks_module.__dict__.items():
+        if not asset_name.lower().startswith("_test"):
+            continue
+        if not (inspect.isclass(asset) or inspect.isfunction(asset)):
+            continue
         if (
-            (inspect.isclass(asset) or inspect.isfunction(asset))
-            and asset_name.lower().startswith("_test")
-            and inspect.getmodule(asset) is mocks_module
-        )
-    }
+            getattr(asset, "__module__", None) == mocks_module.__name__
+            and _cached_getmodule(asset) is mocks_module
+        ):
+            asset_map[asset] = asset_name
+    return asset_map
@@ -0,0 +1,69 @@
+"""Test the dependency_record_all_scopes option.
+"""
+
+import pytest
+
+
+def test_not_set(ctestdir):
+    """No pytest.ini setting, dependency_record_all_scopes defaults to true.
+
+    Outcomes are recorded in all scopes, so a module scoped dependency
+    may be resolved in session scope as well.
+    """
+    ctestdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.dependency()
+        def test_a():
+            pass
+
+        @pytest.mark.dependency(
+            depends=["test_not_set.py::test_a"], scope='session'
+        )
+        def test_b():
+            pass
+    """)
+    result = ctestdir.runpytest("--verbose")
+    result.assert_outcomes(passed=2, skipped=0, failed=0)
+
+
+def test_set_false(ctestdir):
+    """dependency_record_all_scopes is set to false.
+
+    Outcomes are only recorded in the scope declared on the marker and
+    in session scope.  test_a declares class scope, so its outcome is
+    not available in module scope and test_b is skipped, while the
+    session scoped lookup in test_c still succeeds.
+    """
+    ctestdir.makefile('.ini', pytest="""
+        [pytest]
+        dependency_record_all_scopes = false
+        console_output_style = classic
+    """)
+    ctestdir.makepyfile("""
+        import pytest
+
+        class TestClass(object):
+
+            @pytest.mark.dependency(scope='class')
+            def test_a(self):
+                pass
+
+        @pytest.mark.dependency(depends=["TestClass::test_a"])
+        def test_b():
+            pass
+
+        @pytest.mark.dependency(
+            depends=["test_set_false.py::TestClass::test_a"],
+            scope='session'
+        )
+        def test_c():
+            pass
+    """)
+    result = ctestdir.runpytest("--verbose", "-rs")
+    result.assert_outcomes(passed=2, skipped=1, failed=0)
+    result.stdout.re_match_lines(r"""
+        .*::TestClass::test_a PASSED
+        .*::test_b SKIPPED(?:\s+\(.*\))?
+        .*::test_c PASSED
+    """)
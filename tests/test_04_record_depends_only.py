@@ -0,0 +1,69 @@
+"""Test the dependency_record_depends_only option.
+"""
+
+import pytest
+
+
+def test_not_set(ctestdir):
+    """No pytest.ini setting, dependency_record_depends_only defaults
+    to false.
+
+    All marked outcomes are recorded, so the runtime depends() call in
+    test_c resolves test_b although no marker refers to it.
+    """
+    ctestdir.makepyfile("""
+        import pytest
+        from pytest_dependency import depends
+
+        @pytest.mark.dependency()
+        def test_a():
+            pass
+
+        @pytest.mark.dependency(depends=["test_a"])
+        def test_b():
+            pass
+
+        @pytest.mark.dependency()
+        def test_c(request):
+            depends(request, ["test_b"])
+    """)
+    result = ctestdir.runpytest("--verbose")
+    result.assert_outcomes(passed=3, skipped=0, failed=0)
+
+
+def test_set_true(ctestdir):
+    """dependency_record_depends_only is set to true.
+
+    Only outcomes of tests that some marker refers to are recorded.
+    The marker declared dependency of test_b on test_a still works,
+    but the runtime depends() call in test_c names test_b, which no
+    marker refers to, so test_c is skipped.
+    """
+    ctestdir.makefile('.ini', pytest="""
+        [pytest]
+        dependency_record_depends_only = true
+        console_output_style = classic
+    """)
+    ctestdir.makepyfile("""
+        import pytest
+        from pytest_dependency import depends
+
+        @pytest.mark.dependency()
+        def test_a():
+            pass
+
+        @pytest.mark.dependency(depends=["test_a"])
+        def test_b():
+            pass
+
+        @pytest.mark.dependency()
+        def test_c(request):
+            depends(request, ["test_b"])
+    """)
+    result = ctestdir.runpytest("--verbose", "-rs")
+    result.assert_outcomes(passed=2, skipped=1, failed=0)
+    result.stdout.re_match_lines(r"""
+        .*::test_a PASSED
+        .*::test_b PASSED
+        .*::test_c SKIPPED(?:\s+\(.*\))?
+    """)